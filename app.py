@@ -1,34 +1,89 @@
 import os
+import time
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
-from flask_socketio import SocketIO
+from extensions import db, mail, socketio
+from socket_stats import count_egress, counting_serializer
 
-class Base(DeclarativeBase):
-    pass
+# Imported for their side effects before any init_app(): models register their
+# tables on db.metadata, and socket_events adds its @socketio.on handlers to
+# socketio.handlers, which every init_app() attaches to the server it builds.
+import models
+import socket_events
 
-db = SQLAlchemy(model_class=Base)
-app = Flask(__name__)
+def create_app():
+    started = time.perf_counter()
+    app = Flask(__name__)
 
-# Configure app using environment variables
-app.secret_key = os.environ.get("FLASK_SECRET_KEY") or "dev_key_fortune100"
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+    # Configure app using environment variables
+    app.secret_key = os.environ.get("FLASK_SECRET_KEY") or "dev_key_fortune100"
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
 
-# Configure upload folder
-app.config['UPLOAD_FOLDER'] = os.path.join('static', 'documents')
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    # Configure upload folder
+    app.config['UPLOAD_FOLDER'] = os.path.join('static', 'documents')
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-# Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+    # Configure fingerprinted static assets (built with `flask build-assets`)
+    app.config['ASSET_FOLDER'] = os.environ.get("ASSET_FOLDER") or os.path.join(app.static_folder, 'dist')
+    app.config['ASSET_MAX_AGE'] = 365 * 24 * 60 * 60  # hashed names never change content
 
-db.init_app(app)
+    # Configure columnar export snapshots
+    app.config['EXPORT_FOLDER'] = os.environ.get("EXPORT_FOLDER") or os.path.join(app.instance_path, 'exports')
+    app.config['EXPORT_SNAPSHOT_INTERVAL'] = int(os.environ.get("EXPORT_SNAPSHOT_INTERVAL", 3600))  # seconds, 0 disables
 
-with app.app_context():
-    import models
-    db.create_all()
+    # Configure hot/cold archival of finished deals
+    app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get("ARCHIVE_AFTER_DAYS", 365))
+    app.config['ARCHIVE_BATCH_SIZE'] = int(os.environ.get("ARCHIVE_BATCH_SIZE", 500))
 
-from routes import *
+    # Configure Socket.IO framing; templates load the matching client bundle
+    app.config['SOCKETIO_SERIALIZER'] = os.environ.get("SOCKETIO_SERIALIZER", "msgpack")  # msgpack or default (JSON text)
+    app.config['SOCKETIO_COMPRESSION_THRESHOLD'] = int(os.environ.get("SOCKETIO_COMPRESSION_THRESHOLD", 1024))  # bytes
+
+    # Configure company duplicate detection (scores range 0-1)
+    app.config['DEDUP_MATCH_THRESHOLD'] = float(os.environ.get("DEDUP_MATCH_THRESHOLD", 0.85))
+    app.config['DEDUP_MERGE_THRESHOLD'] = float(os.environ.get("DEDUP_MERGE_THRESHOLD", 0.95))  # auto-merge in batch scans
+
+    # Configure outgoing mail; point MAIL_PORT at a local SMTP stand-in to test
+    app.config['MAIL_SERVER'] = os.environ.get("MAIL_SERVER", "localhost")
+    app.config['MAIL_PORT'] = int(os.environ.get("MAIL_PORT", 25))
+    app.config['MAIL_USE_TLS'] = os.environ.get("MAIL_USE_TLS", "false").lower() == "true"
+    app.config['MAIL_USERNAME'] = os.environ.get("MAIL_USERNAME")
+    app.config['MAIL_PASSWORD'] = os.environ.get("MAIL_PASSWORD")
+    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get("MAIL_DEFAULT_SENDER", "partnerships@collabtracker.local")
+    app.config['MAIL_MAX_EMAILS'] = int(os.environ.get("MAIL_MAX_EMAILS", 500))  # messages per SMTP session
+
+    # Configure meeting-reminder digests
+    app.config['REMINDER_WINDOW_DAYS'] = int(os.environ.get("REMINDER_WINDOW_DAYS", 7))
+    app.config['REMINDER_BATCH_SIZE'] = int(os.environ.get("REMINDER_BATCH_SIZE", 200))  # digests rendered at a time
+    app.config['REMINDER_SEND_DELAY'] = float(os.environ.get("REMINDER_SEND_DELAY", 0.05))  # seconds between messages
+    app.config['REMINDER_MAX_RETRIES'] = int(os.environ.get("REMINDER_MAX_RETRIES", 3))
+    app.config['REMINDER_INTERVAL'] = int(os.environ.get("REMINDER_INTERVAL", 86400))  # seconds, 0 disables
+    app.config['REMINDER_HOUR'] = int(os.environ.get("REMINDER_HOUR", 8))  # local hour of the first run
+
+    # Bind extensions; the engine connects on first use, not here.
+    # The schema is created explicitly with `flask init-db`.
+    db.init_app(app)
+    mail.init_app(app)
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        serializer=counting_serializer(app.config['SOCKETIO_SERIALIZER']),
+        http_compression=True,
+        compression_threshold=app.config['SOCKETIO_COMPRESSION_THRESHOLD']
+    )
+    count_egress(socketio.server.eio)
+
+    from routes import bp
+    from commands import register_commands
+    from assets import asset_url, asset_urls
+    app.register_blueprint(bp)
+    register_commands(app)
+    app.jinja_env.globals.update(asset_url=asset_url, asset_urls=asset_urls)
+
+    boot_seconds = time.perf_counter() - started
+    app.extensions['boot_stats'] = {'pid': os.getpid(), 'create_app_seconds': boot_seconds}
+    app.logger.info(f'Worker {os.getpid()} built app in {boot_seconds * 1000:.1f} ms')
+    return app
@@ -0,0 +1,118 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import Date, cast, delete, func, insert, literal, select, text, union_all
+from sqlalchemy.exc import OperationalError
+
+from extensions import db
+from models import (ArchivedCollaboration, ArchivedDocument, ArchivedOpportunity,
+                    Collaboration, Document, Opportunity)
+
+# Hot/cold split for finished deals. Rows past the configured age are moved
+# in small, individually committed batches, so a run can be interrupted and
+# simply started again; each batch only holds row locks on the ids it moves.
+
+ARCHIVE_PAIRS = {
+    Collaboration: ArchivedCollaboration,
+    Opportunity: ArchivedOpportunity,
+    Document: ArchivedDocument,
+}
+
+# SQLSTATE lock_not_available, raised when lock_timeout expires.
+LOCK_NOT_AVAILABLE = '55P03'
+
+LOCK_RETRIES = 3
+
+def live_columns(model):
+    return [column.name for column in model.__table__.columns]
+
+def collaboration_source(include_archived=False):
+    return _source(Collaboration, include_archived)
+
+def opportunity_source(include_archived=False):
+    return _source(Opportunity, include_archived)
+
+def _source(model, include_archived):
+    # Live queries read the hot table directly; analytics and exports can ask
+    # for a UNION ALL with the archive under the same column names.
+    table = model.__table__
+    if not include_archived:
+        return table
+    archive_table = ARCHIVE_PAIRS[model].__table__
+    names = live_columns(model)
+    return union_all(
+        select(*[table.c[name] for name in names]),
+        select(*[archive_table.c[name] for name in names])
+    ).subquery(table.name)
+
+def collaboration_candidates(cutoff):
+    finished_on = func.coalesce(Collaboration.end_date, cast(Collaboration.created_at, Date))
+    return select(Collaboration.id).where(
+        Collaboration.status == 'Completed',
+        finished_on < cutoff
+    )
+
+def opportunity_candidates(cutoff):
+    return select(Opportunity.id).where(
+        Opportunity.stage == 'Closed',
+        func.coalesce(Opportunity.updated_at, Opportunity.created_at) < cutoff
+    )
+
+def move_rows(model, condition, archived_at):
+    names = live_columns(model)
+    archive_table = ARCHIVE_PAIRS[model].__table__
+    db.session.execute(
+        insert(archive_table).from_select(
+            names + ['archived_at'],
+            select(*[model.__table__.c[name] for name in names],
+                   literal(archived_at, type_=archive_table.c.archived_at.type)).where(condition)
+        )
+    )
+    return db.session.execute(delete(model.__table__).where(condition)).rowcount
+
+def archive_batch(model, candidates, batch_size):
+    with db.session.begin():
+        if db.engine.dialect.name == 'postgresql':
+            # Give up on this batch rather than queue behind (or block) live writers.
+            db.session.execute(text("SET LOCAL lock_timeout = '2s'"))
+        ids = db.session.execute(
+            candidates.order_by(model.id).limit(batch_size).with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            return 0
+
+        archived_at = datetime.utcnow()
+        if model is Collaboration:
+            move_rows(Document, Document.collaboration_id.in_(ids), archived_at)
+        return move_rows(model, model.id.in_(ids), archived_at)
+
+def archive_history(older_than_days, batch_size=500, pause=0.1, max_batches=None, log=print):
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    totals = {}
+    for model, candidates in ((Collaboration, collaboration_candidates(cutoff.date())),
+                              (Opportunity, opportunity_candidates(cutoff))):
+        moved = batches = 0
+        retries = 0
+        while max_batches is None or batches < max_batches:
+            try:
+                count = archive_batch(model, candidates, batch_size)
+            except OperationalError as e:
+                db.session.rollback()
+                if getattr(e.orig, 'pgcode', None) != LOCK_NOT_AVAILABLE:
+                    raise
+                if retries == LOCK_RETRIES:
+                    # Leave the rest of this table for the next run.
+                    log(f'Skipping {model.__tablename__}: rows still locked after {retries} retries')
+                    break
+                retries += 1
+                time.sleep(max(pause, 1) * 2 ** retries)
+                continue
+            retries = 0
+            if not count:
+                break
+            moved += count
+            batches += 1
+            log(f'Archived {moved} {model.__tablename__} rows so far')
+            time.sleep(pause)
+        totals[model.__tablename__] = moved
+    return totals
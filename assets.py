@@ -0,0 +1,266 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import urllib.request
+from collections import namedtuple
+
+from flask import current_app, request, send_from_directory, url_for
+
+# Static asset pipeline. Third-party libraries are vendored under
+# static/vendor and committed, so builds and deploys never touch the network;
+# `flask vendor-assets` (re)downloads them and checks each against its pinned
+# sha256. `flask build-assets` bundles and minifies the app's own files,
+# fingerprints everything into ASSET_FOLDER with gzip/brotli siblings and a
+# manifest. Templates resolve names through asset_url().
+
+VendorAsset = namedtuple('VendorAsset', 'url sha256')
+
+# sha256 None means "not pinned yet": vendor-assets refuses to write the file
+# and reports the digest of what it downloaded so it can be reviewed and pinned.
+# The Replit theme URL carries no version, so its pin is the only thing that
+# keeps it from changing underneath us.
+VENDOR_ASSETS = {
+    'vendor/bootstrap/bootstrap-agent-dark-theme.min.css': VendorAsset(
+        'https://cdn.replit.com/agent/bootstrap-agent-dark-theme.min.css', None),
+    'vendor/bootstrap/bootstrap.bundle.min.js': VendorAsset(
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js', None),
+    'vendor/bootstrap-icons/bootstrap-icons.min.css': VendorAsset(
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.min.css', None),
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff2': VendorAsset(
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/fonts/bootstrap-icons.woff2', None),
+    'vendor/bootstrap-icons/fonts/bootstrap-icons.woff': VendorAsset(
+        'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/fonts/bootstrap-icons.woff', None),
+    'vendor/socket.io/socket.io.min.js': VendorAsset(
+        'https://cdn.socket.io/4.7.2/socket.io.min.js', None),
+    'vendor/socket.io/socket.io.msgpack.min.js': VendorAsset(
+        'https://cdn.socket.io/4.7.2/socket.io.msgpack.min.js', None),
+    'vendor/chart.js/chart.umd.js': VendorAsset(
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js', None),
+}
+
+# Logical bundle name -> source files under static/, concatenated in order.
+BUNDLES = {
+    'css/app.css': ['css/custom.css'],
+    'js/app.js': ['js/realtime.js', 'js/websocket.js', 'js/search.js'],
+    'js/dashboard.js': ['js/dashboard.js'],
+    'js/pipeline.js': ['js/pipeline.js'],
+    'js/analytics.js': ['js/analytics.js'],
+}
+
+# Fonts are referenced by relative url() from their stylesheet, so they keep
+# their path (upstream already versions them with a query string).
+UNHASHED_SUFFIXES = ('.woff', '.woff2')
+
+COMPRESSIBLE_SUFFIXES = ('.js', '.css', '.svg', '.json')
+
+MANIFEST_NAME = 'manifest.json'
+
+def minify_js(source):
+    # Deliberately conservative: drop indentation, blank lines and whole-line
+    # comments, never touch tokens. A small scanner tracks strings, comments
+    # and template literals (with nested ${...}) so lines inside a template
+    # literal are kept byte for byte. gzip/brotli take care of the rest.
+    lines = []
+    stack = []  # 'T' for template text, an int for the brace depth of a ${...}
+    in_comment = False
+    for line in source.splitlines():
+        in_template = bool(stack) and stack[-1] == 'T'
+        stripped = line.strip()
+        if not in_template and not in_comment and (not stripped or stripped.startswith('//')):
+            continue
+
+        quote = None
+        i = 0
+        while i < len(line):
+            c, pair = line[i], line[i:i + 2]
+            if in_comment:
+                if pair == '*/':
+                    in_comment = False
+                    i += 1
+            elif stack and stack[-1] == 'T':
+                if c == '\\':
+                    i += 1
+                elif c == '`':
+                    stack.pop()
+                elif pair == '${':
+                    stack.append(0)
+                    i += 1
+            elif quote:
+                if c == '\\':
+                    i += 1
+                elif c == quote:
+                    quote = None
+            elif c in '\'"':
+                quote = c
+            elif c == '`':
+                stack.append('T')
+            elif pair == '//':
+                break
+            elif pair == '/*':
+                in_comment = True
+                i += 1
+            elif c == '{' and stack:
+                stack[-1] += 1
+            elif c == '}' and stack:
+                if stack[-1]:
+                    stack[-1] -= 1
+                else:
+                    stack.pop()
+            i += 1
+
+        if not in_template:
+            line = line.lstrip()
+        if not (stack and stack[-1] == 'T'):
+            line = line.rstrip()
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    # Whitespace is significant around ':' (".card :hover" != ".card:hover"),
+    # so only collapse it around punctuation where it never is.
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip() + '\n'
+
+def fingerprint(name, content):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+def write_output(folder, name, content):
+    path = os.path.join(folder, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    if not name.endswith(COMPRESSIBLE_SUFFIXES):
+        return
+    with open(path + '.gz', 'wb') as f:
+        # mtime=0 keeps the .gz byte-identical across builds
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(content)
+    import brotli
+    with open(path + '.br', 'wb') as f:
+        f.write(brotli.compress(content, quality=11))
+
+def build_assets(app):
+    static_folder = app.static_folder
+    folder = app.config['ASSET_FOLDER']
+    missing = [name for name in VENDOR_ASSETS if not os.path.exists(os.path.join(static_folder, name))]
+    if missing:
+        # A build without them would quietly keep serving pages from the CDN.
+        raise FileNotFoundError(f'Not vendored yet: {", ".join(missing)}; '
+                                f'run `flask vendor-assets` and commit static/vendor')
+    vendored = {}
+    for name in VENDOR_ASSETS:
+        with open(os.path.join(static_folder, name), 'rb') as f:
+            vendored[name] = f.read()
+        check_pin(name, vendored[name])
+    if os.path.isdir(folder):
+        shutil.rmtree(folder)
+    os.makedirs(folder)
+
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+                parts.append(f.read())
+        if name.endswith('.js'):
+            content = ';\n'.join(minify_js(part) for part in parts)
+        else:
+            content = ''.join(minify_css(part) for part in parts)
+        manifest[name] = fingerprint(name, content.encode('utf-8'))
+        write_output(folder, manifest[name], content.encode('utf-8'))
+
+    for name, content in vendored.items():
+        manifest[name] = name if name.endswith(UNHASHED_SUFFIXES) else fingerprint(name, content)
+        write_output(folder, manifest[name], content)
+
+    with open(os.path.join(folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def check_pin(name, content):
+    digest = hashlib.sha256(content).hexdigest()
+    pinned = VENDOR_ASSETS[name].sha256
+    if pinned is None:
+        raise ValueError(f'{name} is not pinned; its sha256 is {digest}. Review it and add the digest to VENDOR_ASSETS')
+    if digest != pinned:
+        raise ValueError(f'{name} does not match its pinned sha256 (expected {pinned}, got {digest})')
+
+def vendor_assets(app, force=False):
+    fetched = []
+    problems = []
+    for name, asset in VENDOR_ASSETS.items():
+        path = os.path.join(app.static_folder, name)
+        if os.path.exists(path) and not force:
+            continue
+        with urllib.request.urlopen(asset.url, timeout=30) as response:
+            content = response.read()
+        # Nothing lands in static/vendor unless it is exactly the pinned file.
+        try:
+            check_pin(name, content)
+        except ValueError as e:
+            problems.append(str(e))
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        fetched.append(name)
+    if problems:
+        raise ValueError('\n'.join(problems))
+    return fetched
+
+def load_manifest():
+    cache = current_app.extensions.setdefault('asset_manifest', {})
+    if 'entries' not in cache or current_app.debug:
+        try:
+            with open(os.path.join(current_app.config['ASSET_FOLDER'], MANIFEST_NAME)) as f:
+                cache['entries'] = json.load(f)
+        except (OSError, ValueError):
+            cache['entries'] = {}
+    return cache['entries']
+
+def asset_url(filename):
+    built = load_manifest().get(filename)
+    if built:
+        return url_for('main.asset', filename=built)
+    # Unbuilt trees (development) serve sources straight from static/.
+    if filename in VENDOR_ASSETS and not os.path.exists(os.path.join(current_app.static_folder, filename)):
+        warned = current_app.extensions.setdefault('asset_manifest', {}).setdefault('cdn_fallbacks', set())
+        if filename not in warned:
+            warned.add(filename)
+            current_app.logger.warning(f'{filename} is not vendored; serving it from {VENDOR_ASSETS[filename].url}')
+        return VENDOR_ASSETS[filename].url
+    sources = BUNDLES.get(filename, [filename])
+    if len(sources) > 1:
+        raise ValueError(f'{filename} is a multi-file bundle; use asset_urls()')
+    return url_for('static', filename=sources[0])
+
+def asset_urls(filename):
+    if filename in load_manifest() or len(BUNDLES.get(filename, [])) < 2:
+        return [asset_url(filename)]
+    return [url_for('static', filename=source) for source in BUNDLES[filename]]
+
+def send_asset(filename):
+    folder = current_app.config['ASSET_FOLDER']
+    max_age = current_app.config['ASSET_MAX_AGE']
+    mimetype = mimetypes.guess_type(filename)[0]
+
+    response = None
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.exists(os.path.join(folder, filename + suffix)):
+            response = send_from_directory(folder, filename + suffix, mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(folder, filename, max_age=max_age)
+
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,72 @@
+"""Cold-start benchmark: how long a fresh worker takes to import the app and
+build it with create_app(). Every run is a new interpreter, so nothing is
+cached between samples. No database connection is needed.
+
+    python bench_startup.py --runs 20
+    python bench_startup.py --importtime   # slowest modules of one run
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+flask_app = app.create_app()
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000}))
+"""
+
+def probe_env():
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    return env
+
+def run_probe():
+    result = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True,
+                            env=probe_env(), check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def report_importtime(limit):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app; app.create_app()'],
+                            capture_output=True, text=True, env=probe_env(), check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:limit]:
+        print(f'{cumulative_us / 1000:9.1f} ms  {self_us / 1000:8.1f} ms self  {module}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--importtime', action='store_true', help='show the slowest imports instead')
+    parser.add_argument('--limit', type=int, default=25)
+    args = parser.parse_args()
+
+    if args.importtime:
+        report_importtime(args.limit)
+        return
+
+    samples = [run_probe() for _ in range(args.runs)]
+    for key in ('import_ms', 'create_app_ms'):
+        values = [sample[key] for sample in samples]
+        print(f'{key:>14}: median {statistics.median(values):8.1f}  '
+              f'p95 {percentile(values, 95):8.1f}  max {max(values):8.1f}')
+    totals = [sample['import_ms'] + sample['create_app_ms'] for sample in samples]
+    print(f'{"total_ms":>14}: median {statistics.median(totals):8.1f}  '
+          f'p95 {percentile(totals, 95):8.1f}  max {max(totals):8.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import click
+from flask import current_app
+
+from extensions import db
+
+def init_db(drop=False):
+    if drop:
+        db.drop_all()
+    db.create_all()
+    # create_all() skips tables that already exist, so indexes added to an
+    # existing table (e.g. opportunity.next_meeting_date) are created here.
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    # Existing databases start with an empty duplicate-detection index, and
+    # the online check on new companies would find nothing until it is filled.
+    from dedup import company_records, rebuild_index
+    from models import Company, CompanyMatchKey
+
+    with db.session.begin():
+        if db.session.query(CompanyMatchKey.id).first() is None and db.session.query(Company.id).first():
+            rebuild_index(company_records())
+            return True
+    return False
+
+@click.command('init-db')
+@click.option('--drop', is_flag=True, help='Drop all tables before creating them.')
+def init_db_command(drop):
+    """Create the database schema (and optionally reset it)."""
+    if init_db(drop):
+        click.echo('Built the company duplicate-detection index')
+    click.echo('Database schema is up to date')
+
+@click.command('archive-history')
+@click.option('--days', type=int, default=None, help='Archive rows finished more than this many days ago.')
+@click.option('--batch-size', type=int, default=None, help='Rows moved per committed batch.')
+@click.option('--pause', type=float, default=0.1, help='Seconds to sleep between batches.')
+@click.option('--max-batches', type=int, default=None, help='Stop after this many batches per table.')
+def archive_history_command(days, batch_size, pause, max_batches):
+    """Move old completed collaborations and closed opportunities to the archive tables."""
+    from archive import archive_history
+
+    totals = archive_history(
+        days if days is not None else current_app.config['ARCHIVE_AFTER_DAYS'],
+        batch_size=batch_size or current_app.config['ARCHIVE_BATCH_SIZE'],
+        pause=pause,
+        max_batches=max_batches,
+        log=click.echo
+    )
+    for table, moved in totals.items():
+        click.echo(f'{table}: {moved} rows archived')
+
+@click.command('send-reminders')
+@click.option('--days', type=int, default=None, help='Include meetings due within this many days.')
+@click.option('--dry-run', is_flag=True, help='Build the digests without sending anything.')
+def send_reminders_command(days, dry_run):
+    """Email each company contact a digest of their upcoming meetings.
+
+    To try it locally, run an SMTP stand-in such as
+    `python -m aiosmtpd -n -l localhost:1025` and set MAIL_PORT=1025.
+    """
+    from reminders import send_meeting_reminders
+
+    result = send_meeting_reminders(window_days=days, dry_run=dry_run)
+    click.echo(f"{result['digests']} digests covering {result['meetings']} meetings: "
+               f"{result['sent']} sent, {result['failed']} failed")
+
+@click.command('dedup-companies')
+@click.option('--threshold', type=float, default=None, help='Minimum score (0-1) to report a pair.')
+@click.option('--merge', is_flag=True, help='Merge clusters whose pairs all score above the merge threshold.')
+@click.option('--merge-threshold', type=float, default=None, help='Minimum score (0-1) for automatic merges.')
+def dedup_companies_command(threshold, merge, merge_threshold):
+    """Rebuild the company blocking index and report (or merge) likely duplicates."""
+    from dedup import company_records, duplicate_clusters, find_duplicates, merge_companies, rebuild_index
+
+    threshold = threshold if threshold is not None else current_app.config['DEDUP_MATCH_THRESHOLD']
+    merge_threshold = merge_threshold if merge_threshold is not None else current_app.config['DEDUP_MERGE_THRESHOLD']
+    with db.session.begin():
+        records = company_records()
+        rebuild_index(records)
+    names = {record.id: record.name for record in records}
+
+    matches = find_duplicates(records, threshold=threshold)
+    for match in matches:
+        click.echo(f'{match.score:.2f}  #{match.company_id} {names[match.company_id]!r} ~ '
+                   f'#{match.other_id} {names[match.other_id]!r}  ({", ".join(match.reasons)})')
+    click.echo(f'{len(records)} companies scanned, {len(matches)} likely duplicate pairs')
+
+    if merge:
+        clusters = duplicate_clusters([match for match in matches if match.score >= merge_threshold])
+        for keep_id, duplicate_ids in clusters.items():
+            with db.session.begin():
+                merge_companies(keep_id, duplicate_ids)
+            click.echo(f'Merged {duplicate_ids} into #{keep_id} {names[keep_id]!r}')
+
+@click.command('merge-companies')
+@click.argument('keep_id', type=int)
+@click.argument('duplicate_ids', type=int, nargs=-1, required=True)
+def merge_companies_command(keep_id, duplicate_ids):
+    """Repoint everything owned by DUPLICATE_IDS to KEEP_ID and delete the duplicates."""
+    from dedup import merge_companies
+
+    with db.session.begin():
+        moved = merge_companies(keep_id, duplicate_ids)
+    for table, count in moved.items():
+        click.echo(f'{table}: {count} rows moved')
+
+@click.command('vendor-assets')
+@click.option('--force', is_flag=True, help='Download again even if a file is already vendored.')
+def vendor_assets_command(force):
+    """Download the pinned third-party CSS/JS/fonts into static/vendor and check their sha256."""
+    from assets import vendor_assets
+
+    try:
+        fetched = vendor_assets(current_app, force=force)
+    except (OSError, ValueError) as e:
+        raise click.ClickException(str(e))
+    for name in fetched:
+        click.echo(f'Vendored {name}')
+    click.echo(f'{len(fetched)} files downloaded')
+
+@click.command('build-assets')
+def build_assets_command():
+    """Bundle, minify, fingerprint and precompress static assets."""
+    from assets import build_assets
+
+    try:
+        manifest = build_assets(current_app)
+    except (FileNotFoundError, ValueError) as e:
+        raise click.ClickException(str(e))
+    for name, built in sorted(manifest.items()):
+        click.echo(f'{name} -> {built}')
+
+def register_commands(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(archive_history_command)
+    app.cli.add_command(send_reminders_command)
+    app.cli.add_command(dedup_companies_command)
+    app.cli.add_command(merge_companies_command)
+    app.cli.add_command(vendor_assets_command)
+    app.cli.add_command(build_assets_command)
@@ -0,0 +1,245 @@
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+from difflib import SequenceMatcher
+
+from sqlalchemy import delete, func, insert, select, update
+
+from extensions import db
+from models import (ArchivedCollaboration, ArchivedDocument, ArchivedOpportunity, Collaboration,
+                    Company, CompanyMatchKey, Document, Opportunity)
+
+# Duplicate detection for companies. Each company gets a few blocking keys
+# (name prefix, phonetic code, email domain, phone number); only companies
+# sharing a key are ever compared, so a full scan stays close to linear.
+
+CompanyRecord = namedtuple('CompanyRecord', 'id name contact_email contact_phone')
+Match = namedtuple('Match', 'score company_id other_id reasons')
+
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'llc', 'ltd', 'limited',
+    'plc', 'ag', 'sa', 'gmbh', 'nv', 'group', 'holdings', 'the', 'com',
+}
+
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'live.com',
+    'icloud.com', 'me.com', 'aol.com', 'protonmail.com',
+}
+
+# Keys shared by more companies than this say nothing useful about identity
+# and would bring back quadratic comparisons.
+MAX_BLOCK_SIZE = 100
+
+CHILD_MODELS = (Collaboration, Opportunity, Document,
+                ArchivedCollaboration, ArchivedOpportunity, ArchivedDocument)
+
+def normalize_name(name):
+    name = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii')
+    name = name.lower().replace('&', ' and ')
+    tokens = [token for token in re.split(r'[^a-z0-9]+', name) if token and token not in LEGAL_SUFFIXES]
+    return ' '.join(tokens)
+
+def name_variants(name):
+    # "Amazon/AWS" and "Alphabet (Google)" each name two brands.
+    parts = [name or ''] + re.split(r'[/|()]', name or '')
+    variants = []
+    for part in parts:
+        normalized = normalize_name(part)
+        if normalized and normalized not in variants:
+            variants.append(normalized)
+    return variants
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+def email_domain(email):
+    domain = normalize_email(email).rpartition('@')[2]
+    if not domain or domain in FREE_MAIL_DOMAINS:
+        return ''
+    return domain
+
+def normalize_phone(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    # Compare national numbers so "+1 (650) 253-0000" matches "650.253.0000".
+    return digits[-10:] if len(digits) >= 7 else ''
+
+def soundex(word):
+    codes = {c: str(d) for d, letters in enumerate(
+        ['aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r']) for c in letters}
+    word = ''.join(c for c in word.lower() if c.isalpha())
+    if not word:
+        return ''
+    result = word[0]
+    previous = codes.get(word[0])
+    for c in word[1:]:
+        code = codes.get(c)
+        if code != previous and code not in (None, '0'):
+            result += code
+        if c not in 'hw':
+            previous = code
+    return (result + '000')[:4]
+
+def blocking_keys(name, contact_email=None, contact_phone=None):
+    keys = set()
+    for variant in name_variants(name):
+        compact = variant.replace(' ', '')
+        keys.add(f'p:{compact[:5]}')
+        first = variant.split(' ')[0]
+        if first.isalpha():
+            keys.add(f's:{soundex(first)}')
+    domain = email_domain(contact_email)
+    if domain:
+        keys.add(f'd:{domain}')
+    phone = normalize_phone(contact_phone)
+    if phone:
+        keys.add(f't:{phone}')
+    return keys
+
+def score_pair(a, b):
+    reasons = []
+    name_score = 0.0
+    for left in name_variants(a.name):
+        for right in name_variants(b.name):
+            if left == right:
+                name_score = 1.0
+            else:
+                name_score = max(name_score, SequenceMatcher(None, left, right).ratio())
+    if name_score:
+        reasons.append(f'name {name_score:.2f}')
+
+    score = name_score
+    domain = email_domain(a.contact_email)
+    if domain and domain == email_domain(b.contact_email):
+        score += 0.25
+        reasons.append(f'domain {domain}')
+    phone = normalize_phone(a.contact_phone)
+    if phone and phone == normalize_phone(b.contact_phone):
+        score += 0.35
+        reasons.append('phone')
+    return min(score, 1.0), reasons
+
+def company_records():
+    return [CompanyRecord(*row) for row in db.session.query(
+        Company.id, Company.name, Company.contact_email, Company.contact_phone
+    ).order_by(Company.id)]
+
+def index_company(company):
+    db.session.execute(delete(CompanyMatchKey).where(CompanyMatchKey.company_id == company.id))
+    keys = blocking_keys(company.name, company.contact_email, company.contact_phone)
+    if keys:
+        db.session.execute(insert(CompanyMatchKey), [
+            {'company_id': company.id, 'key': key} for key in keys
+        ])
+
+def find_matches(name, contact_email=None, contact_phone=None, threshold=0.85, exclude_id=None,
+                 max_block_size=MAX_BLOCK_SIZE):
+    # Online check: look up candidates through the persisted blocking index,
+    # skipping oversized blocks just like the batch scan does.
+    keys = blocking_keys(name, contact_email, contact_phone)
+    if not keys:
+        return []
+    block_sizes = db.session.query(CompanyMatchKey.key, func.count()).filter(
+        CompanyMatchKey.key.in_(keys)).group_by(CompanyMatchKey.key)
+    keys = [key for key, size in block_sizes if size <= max_block_size]
+    if not keys:
+        return []
+    candidate_ids = select(CompanyMatchKey.company_id).where(CompanyMatchKey.key.in_(keys))
+    candidates = db.session.query(
+        Company.id, Company.name, Company.contact_email, Company.contact_phone
+    ).filter(Company.id.in_(candidate_ids)).all()
+
+    probe = CompanyRecord(None, name, contact_email, contact_phone)
+    matches = []
+    for row in candidates:
+        candidate = CompanyRecord(*row)
+        if candidate.id == exclude_id:
+            continue
+        score, reasons = score_pair(probe, candidate)
+        if score >= threshold:
+            matches.append(Match(score, candidate.id, None, reasons))
+    return sorted(matches, reverse=True)
+
+def rebuild_index(records):
+    db.session.execute(delete(CompanyMatchKey))
+    rows = [{'company_id': record.id, 'key': key}
+            for record in records
+            for key in blocking_keys(record.name, record.contact_email, record.contact_phone)]
+    if rows:
+        db.session.execute(insert(CompanyMatchKey), rows)
+
+def find_duplicates(records, threshold=0.85, max_block_size=MAX_BLOCK_SIZE):
+    # Batch scan: bucket every company by key, then score pairs within each bucket.
+    blocks = defaultdict(list)
+    by_id = {}
+    for record in records:
+        by_id[record.id] = record
+        for key in blocking_keys(record.name, record.contact_email, record.contact_phone):
+            blocks[key].append(record.id)
+
+    pairs = set()
+    for ids in blocks.values():
+        if len(ids) < 2 or len(ids) > max_block_size:
+            continue
+        for i, left in enumerate(ids):
+            for right in ids[i + 1:]:
+                pairs.add((min(left, right), max(left, right)))
+
+    matches = []
+    for left, right in pairs:
+        score, reasons = score_pair(by_id[left], by_id[right])
+        if score >= threshold:
+            matches.append(Match(score, left, right, reasons))
+    return sorted(matches, reverse=True)
+
+def duplicate_clusters(matches):
+    # Union-find over matched pairs; the oldest company in a cluster survives.
+    parent = {}
+
+    def find(company_id):
+        parent.setdefault(company_id, company_id)
+        while parent[company_id] != company_id:
+            parent[company_id] = parent[parent[company_id]]
+            company_id = parent[company_id]
+        return company_id
+
+    for match in matches:
+        left, right = find(match.company_id), find(match.other_id)
+        if left != right:
+            parent[max(left, right)] = min(left, right)
+
+    clusters = defaultdict(list)
+    for company_id in parent:
+        clusters[find(company_id)].append(company_id)
+    return {keep_id: sorted(set(ids) - {keep_id}) for keep_id, ids in clusters.items() if len(ids) > 1}
+
+def merge_companies(keep_id, duplicate_ids):
+    duplicate_ids = [company_id for company_id in duplicate_ids if company_id != keep_id]
+    if not duplicate_ids:
+        return {}
+    keep = db.session.get(Company, keep_id)
+    if keep is None:
+        raise ValueError(f'Company {keep_id} does not exist')
+
+    # Fill gaps on the survivor from the duplicates before they go away.
+    fields = ('industry', 'contact_email', 'contact_phone', 'logo_url')
+    for row in db.session.query(*[getattr(Company, field) for field in fields]).filter(
+            Company.id.in_(duplicate_ids)).order_by(Company.id):
+        for field, value in zip(fields, row):
+            if not getattr(keep, field) and value:
+                setattr(keep, field, value)
+
+    moved = {}
+    for model in CHILD_MODELS:
+        result = db.session.execute(
+            update(model).where(model.company_id.in_(duplicate_ids)).values(company_id=keep_id)
+            .execution_options(synchronize_session=False)
+        )
+        moved[model.__tablename__] = result.rowcount
+
+    db.session.execute(delete(CompanyMatchKey).where(CompanyMatchKey.company_id.in_(duplicate_ids)))
+    db.session.execute(
+        delete(Company).where(Company.id.in_(duplicate_ids)).execution_options(synchronize_session=False)
+    )
+    db.session.flush()
+    index_company(keep)
+    return moved
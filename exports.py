@@ -0,0 +1,254 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime
+from functools import partial
+
+from flask import current_app
+
+from extensions import db, socketio
+from archive import collaboration_source, opportunity_source
+from models import Company
+
+# Columnar snapshots of the export tables, rebuilt by a background job and
+# served straight from disk so repeated BI pulls skip the table scan.
+
+SNAPSHOT_FORMATS = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+}
+
+SNAPSHOT_COMPRESSION = 'zstd'
+
+# Builds share one process with the scheduler and request handlers.
+_build_locks = defaultdict(threading.Lock)
+_refresh_lock = threading.Lock()
+
+# Column types use Arrow aliases so pyarrow is only imported by the job that
+# writes snapshots, not by every worker that imports the routes.
+COLLABORATION_COLUMNS = [
+    ('id', 'int32'),
+    ('company_id', 'int32'),
+    ('title', 'string'),
+    ('company_name', 'string'),
+    ('status', 'string'),
+    ('start_date', 'date32'),
+    ('end_date', 'date32'),
+    ('revenue', 'double'),
+    ('satisfaction', 'int32'),
+    ('created_at', 'timestamp[us]'),
+]
+
+OPPORTUNITY_COLUMNS = [
+    ('id', 'int32'),
+    ('company_id', 'int32'),
+    ('title', 'string'),
+    ('company_name', 'string'),
+    ('stage', 'string'),
+    ('expected_revenue', 'double'),
+    ('probability', 'int32'),
+    ('next_meeting_date', 'date32'),
+    ('created_at', 'timestamp[us]'),
+    ('updated_at', 'timestamp[us]'),
+]
+
+def collaboration_rows(include_archived=False):
+    collaborations = collaboration_source(include_archived)
+    return db.session.query(
+        collaborations.c.id,
+        collaborations.c.company_id,
+        collaborations.c.title,
+        Company.name,
+        collaborations.c.status,
+        collaborations.c.start_date,
+        collaborations.c.end_date,
+        collaborations.c.kpi_revenue,
+        collaborations.c.kpi_satisfaction,
+        collaborations.c.created_at
+    ).join(Company, collaborations.c.company_id == Company.id).order_by(collaborations.c.id).all()
+
+def opportunity_rows(include_archived=False):
+    opportunities = opportunity_source(include_archived)
+    return db.session.query(
+        opportunities.c.id,
+        opportunities.c.company_id,
+        opportunities.c.title,
+        Company.name,
+        opportunities.c.stage,
+        opportunities.c.expected_revenue,
+        opportunities.c.probability,
+        opportunities.c.next_meeting_date,
+        opportunities.c.created_at,
+        opportunities.c.updated_at
+    ).join(Company, opportunities.c.company_id == Company.id).order_by(opportunities.c.id).all()
+
+SNAPSHOT_DATASETS = {
+    'collaborations': (collaboration_rows, COLLABORATION_COLUMNS),
+    'opportunities': (opportunity_rows, OPPORTUNITY_COLUMNS),
+    # Hot rows plus everything moved out by the archiver.
+    'collaborations_all': (partial(collaboration_rows, include_archived=True), COLLABORATION_COLUMNS),
+    'opportunities_all': (partial(opportunity_rows, include_archived=True), OPPORTUNITY_COLUMNS),
+}
+
+def snapshot_folder():
+    folder = current_app.config['EXPORT_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def snapshot_path(snapshot, fmt):
+    return os.path.join(snapshot_folder(), snapshot['files'][fmt])
+
+def manifest_path(dataset):
+    return os.path.join(snapshot_folder(), f'{dataset}.json')
+
+def temp_path(prefix, suffix):
+    fd, path = tempfile.mkstemp(dir=snapshot_folder(), prefix=f'.{prefix}.', suffix=f'{suffix}.tmp')
+    os.close(fd)
+    return path
+
+def build_table(rows, columns):
+    import pyarrow as pa
+
+    schema = pa.schema([(name, pa.type_for_alias(alias)) for name, alias in columns])
+    # Transpose the result tuples once and hand whole columns to Arrow,
+    # instead of formatting every value per row like the CSV export does.
+    values = list(zip(*rows)) if rows else [[] for _ in schema]
+    arrays = [pa.array(column, type=field.type) for column, field in zip(values, schema)]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(dataset):
+    try:
+        with open(manifest_path(dataset)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not all(os.path.exists(snapshot_path(manifest, fmt)) for fmt in SNAPSHOT_FORMATS):
+        return None
+    return manifest
+
+def prune_snapshots(dataset, keep_versions):
+    # The previous version stays on disk so responses that read the old
+    # manifest a moment ago can still open their file.
+    prefix = f'{dataset}.'
+    for name in os.listdir(snapshot_folder()):
+        if not name.startswith(prefix) or name.endswith('.json'):
+            continue
+        version = name[len(prefix):].split('.', 1)[0]
+        if version not in keep_versions:
+            try:
+                os.remove(os.path.join(snapshot_folder(), name))
+            except OSError:
+                pass
+
+def write_snapshot(dataset):
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    query, columns = SNAPSHOT_DATASETS[dataset]
+    with db.session.begin():
+        rows = query()
+    table = build_table(rows, columns)
+
+    tmp_paths = {fmt: temp_path(dataset, f'.{fmt}') for fmt in SNAPSHOT_FORMATS}
+    try:
+        pq.write_table(table, tmp_paths['parquet'], compression=SNAPSHOT_COMPRESSION)
+        feather.write_feather(table, tmp_paths['arrow'], compression=SNAPSHOT_COMPRESSION)
+
+        version = file_digest(tmp_paths['parquet'])[:16]
+        current = load_manifest(dataset)
+        if current and current['version'] == version:
+            # Unchanged data keeps its files and stamp so client ETags stay valid.
+            return current
+
+        # Files are named by version and the manifest is swapped in last, so a
+        # reader always sees a parquet/arrow pair from the same build.
+        files = {fmt: f'{dataset}.{version}.{fmt}' for fmt in SNAPSHOT_FORMATS}
+        for fmt, tmp_path in tmp_paths.items():
+            os.replace(tmp_path, os.path.join(snapshot_folder(), files[fmt]))
+    finally:
+        for tmp_path in tmp_paths.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    manifest = {
+        'dataset': dataset,
+        'version': version,
+        'files': files,
+        'rows': table.num_rows,
+        'generated_at': datetime.utcnow().isoformat(),
+    }
+    tmp_manifest = temp_path(dataset, '.json')
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest, manifest_path(dataset))
+    prune_snapshots(dataset, {version, current['version'] if current else None})
+    return manifest
+
+def acquire(lock):
+    # Poll instead of blocking so waiting never stalls the eventlet hub.
+    while not lock.acquire(blocking=False):
+        socketio.sleep(0.1)
+
+def build_snapshot(dataset, reuse_existing=False):
+    lock = _build_locks[dataset]
+    acquire(lock)
+    try:
+        # Whoever held the lock may have just built what we were waiting for.
+        if reuse_existing:
+            existing = load_manifest(dataset)
+            if existing:
+                return existing
+        return write_snapshot(dataset)
+    finally:
+        lock.release()
+
+def get_snapshot(dataset):
+    return load_manifest(dataset) or build_snapshot(dataset, reuse_existing=True)
+
+def refresh_snapshots(app):
+    with app.app_context():
+        try:
+            for dataset in SNAPSHOT_DATASETS:
+                try:
+                    build_snapshot(dataset)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f'Failed to build {dataset} snapshot: {str(e)}')
+        finally:
+            db.session.remove()
+
+def start_refresh(app):
+    # At most one on-demand refresh per process; extra requests are no-ops.
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            refresh_snapshots(app)
+        finally:
+            _refresh_lock.release()
+
+    socketio.start_background_task(run)
+    return True
+
+def start_snapshot_scheduler(app):
+    interval = app.config['EXPORT_SNAPSHOT_INTERVAL']
+    if not interval:
+        return None
+
+    def run():
+        while True:
+            refresh_snapshots(app)
+            socketio.sleep(interval)
+
+    return socketio.start_background_task(run)
@@ -0,0 +1,14 @@
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import DeclarativeBase
+from flask_socketio import SocketIO
+from flask_mail import Mail
+
+# Extensions are created unbound and attached to an app in create_app(), so
+# importing models or helpers never builds an app or touches the database.
+
+class Base(DeclarativeBase):
+    pass
+
+db = SQLAlchemy(model_class=Base)
+socketio = SocketIO()
+mail = Mail()
@@ -1,4 +1,11 @@
-from app import app, socketio
+from app import create_app
+from extensions import socketio
+from exports import start_snapshot_scheduler
+from reminders import start_reminder_scheduler
+
+app = create_app()
 
 if __name__ == "__main__":
+    start_snapshot_scheduler(app)
+    start_reminder_scheduler(app)
     socketio.run(app, host="0.0.0.0", port=5000, allow_unsafe_werkzeug=True)
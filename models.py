@@ -1,5 +1,5 @@
 from datetime import datetime
-from app import db
+from extensions import db
 
 class Company(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -13,6 +13,14 @@ class Company(db.Model):
     opportunities = db.relationship('Opportunity', backref='company', lazy=True, cascade='all, delete-orphan')
     documents = db.relationship('Document', backref='company', lazy=True, cascade='all, delete-orphan')
 
+# Blocking index for duplicate detection: a handful of normalized name,
+# phonetic, email-domain and phone keys per company (see dedup.py).
+class CompanyMatchKey(db.Model):
+    __tablename__ = 'company_match_key'
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id', ondelete='CASCADE'), nullable=False, index=True)
+    key = db.Column(db.String(120), nullable=False, index=True)
+
 class Collaboration(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('company.id', ondelete='CASCADE'), nullable=False)
@@ -33,7 +41,7 @@ class Opportunity(db.Model):
     stage = db.Column(db.String(50), nullable=False)  # Lead, Meeting, Proposal, Negotiation, Closed
     expected_revenue = db.Column(db.Float)
     probability = db.Column(db.Integer)  # 0-100%
-    next_meeting_date = db.Column(db.Date)
+    next_meeting_date = db.Column(db.Date, index=True)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -48,3 +56,58 @@ class Document(db.Model):
     collaboration_id = db.Column(db.Integer, db.ForeignKey('collaboration.id', ondelete='CASCADE'))
     description = db.Column(db.Text)
     version = db.Column(db.String(50))
+
+# One row per meeting a reminder digest has already covered, so restarts and
+# overlapping reminder windows never email the same meeting twice. A
+# rescheduled meeting has a new date and is reminded again.
+class MeetingReminder(db.Model):
+    __tablename__ = 'meeting_reminder'
+    __table_args__ = (db.UniqueConstraint('opportunity_id', 'meeting_date'),)
+    id = db.Column(db.Integer, primary_key=True)
+    opportunity_id = db.Column(db.Integer, db.ForeignKey('opportunity.id', ondelete='CASCADE'), nullable=False)
+    meeting_date = db.Column(db.Date, nullable=False)
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# Cold storage for completed collaborations, closed opportunities and the
+# metadata of their documents. Rows keep their original ids so links and
+# exports stay stable after archiving.
+class ArchivedCollaboration(db.Model):
+    __tablename__ = 'archived_collaboration'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id', ondelete='CASCADE'), nullable=False, index=True)
+    title = db.Column(db.String(200), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date)
+    description = db.Column(db.Text)
+    kpi_revenue = db.Column(db.Float)
+    kpi_satisfaction = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class ArchivedOpportunity(db.Model):
+    __tablename__ = 'archived_opportunity'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id', ondelete='CASCADE'), nullable=False, index=True)
+    title = db.Column(db.String(200), nullable=False)
+    stage = db.Column(db.String(50), nullable=False)
+    expected_revenue = db.Column(db.Float)
+    probability = db.Column(db.Integer)
+    next_meeting_date = db.Column(db.Date)
+    notes = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class ArchivedDocument(db.Model):
+    __tablename__ = 'archived_document'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    file_type = db.Column(db.String(100))
+    upload_date = db.Column(db.DateTime)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id', ondelete='CASCADE'), nullable=False, index=True)
+    collaboration_id = db.Column(db.Integer, index=True)
+    description = db.Column(db.Text)
+    version = db.Column(db.String(50))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
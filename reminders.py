@@ -0,0 +1,208 @@
+import smtplib
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from itertools import groupby, islice
+
+from flask import current_app, render_template
+from flask_mail import Message
+from sqlalchemy import and_, delete, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db, mail, socketio
+from models import Company, MeetingReminder, Opportunity
+
+# Daily digest of upcoming meetings, one email per company contact. All due
+# meetings come from a single range query on the indexed next_meeting_date,
+# and every digest of a run goes out over one reused SMTP session. Meetings
+# are claimed in meeting_reminder before anything is sent, so overlapping
+# runs (scheduler and CLI) and restarts never email the same meeting twice.
+
+Meeting = namedtuple('Meeting', 'opportunity_id title stage meeting_date')
+Digest = namedtuple('Digest', 'contact_email company_names meetings')
+
+# Connection-level failures are worth a reconnect; anything else (e.g. a
+# refused recipient) would fail the same way again.
+RETRYABLE_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                    smtplib.SMTPHeloError, ConnectionError, TimeoutError)
+
+DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def due_meetings(start, end):
+    return db.session.query(
+        Company.contact_email,
+        Company.name,
+        Opportunity.id,
+        Opportunity.title,
+        Opportunity.stage,
+        Opportunity.next_meeting_date
+    ).join(Company).outerjoin(MeetingReminder, and_(
+        MeetingReminder.opportunity_id == Opportunity.id,
+        MeetingReminder.meeting_date == Opportunity.next_meeting_date
+    )).filter(
+        Opportunity.next_meeting_date >= start,
+        Opportunity.next_meeting_date < end,
+        Opportunity.stage != 'Closed',
+        MeetingReminder.id.is_(None),
+        Company.contact_email.isnot(None),
+        Company.contact_email != ''
+    ).order_by(Company.contact_email, Opportunity.next_meeting_date, Opportunity.id).all()
+
+def group_digests(rows):
+    # Rows arrive sorted by contact, so a single pass builds every digest.
+    for contact_email, contact_rows in groupby(rows, key=lambda row: row[0]):
+        company_names = []
+        meetings = []
+        for _, company_name, opportunity_id, title, stage, meeting_date in contact_rows:
+            if company_name not in company_names:
+                company_names.append(company_name)
+            meetings.append(Meeting(opportunity_id, title, stage, meeting_date))
+        yield Digest(contact_email, company_names, meetings)
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def build_message(digest, start, end):
+    context = dict(digest=digest, start=start, end=end - timedelta(days=1))
+    return Message(
+        subject=f'{len(digest.meetings)} upcoming meeting{"s" if len(digest.meetings) != 1 else ""} '
+                f'with {", ".join(digest.company_names)}',
+        recipients=[digest.contact_email],
+        body=render_template('email/meeting_digest.txt', **context),
+        html=render_template('email/meeting_digest.html', **context)
+    )
+
+class DigestSender:
+    def __init__(self, delay, max_retries):
+        self.delay = delay
+        self.max_retries = max_retries
+        self.connection = None
+        self.sent = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def open(self):
+        if self.connection is None:
+            self.connection = mail.connect()
+            self.connection.__enter__()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.__exit__(None, None, None)
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.connection = None
+
+    def send(self, message):
+        delivered = False
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.open().send(message)
+                self.sent += 1
+                delivered = True
+                break
+            except RETRYABLE_ERRORS as e:
+                self.close()
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    current_app.logger.error(f'Giving up on reminder to {message.recipients}: {str(e)}')
+                    break
+                socketio.sleep(min(2 ** attempt, 30))
+            except smtplib.SMTPException as e:
+                self.failed += 1
+                current_app.logger.error(f'Reminder to {message.recipients} rejected: {str(e)}')
+                break
+        if self.delay:
+            socketio.sleep(self.delay)
+        return delivered
+
+def claim_meetings(meetings):
+    # Whichever run inserts a (opportunity, date) row first owns that reminder;
+    # a concurrent run gets nothing back for it and leaves it alone.
+    if not meetings:
+        return set()
+    stmt = DIALECT_INSERTS[db.engine.dialect.name](MeetingReminder).values([
+        {'opportunity_id': meeting.opportunity_id, 'meeting_date': meeting.meeting_date}
+        for meeting in meetings
+    ]).on_conflict_do_nothing(
+        index_elements=['opportunity_id', 'meeting_date']
+    ).returning(MeetingReminder.opportunity_id, MeetingReminder.meeting_date)
+    return set(db.session.execute(stmt).all())
+
+def release_meetings(meetings):
+    # A digest that could not be delivered is left for the next run.
+    db.session.execute(delete(MeetingReminder).where(
+        tuple_(MeetingReminder.opportunity_id, MeetingReminder.meeting_date).in_(
+            [(meeting.opportunity_id, meeting.meeting_date) for meeting in meetings])
+    ))
+
+def send_meeting_reminders(window_days=None, start=None, dry_run=False):
+    config = current_app.config
+    start = start or date.today()
+    end = start + timedelta(days=window_days or config['REMINDER_WINDOW_DAYS'])
+
+    # Read everything up front so no transaction stays open while talking SMTP.
+    with db.session.begin():
+        rows = due_meetings(start, end)
+
+    digests = meetings = 0
+    with DigestSender(config['REMINDER_SEND_DELAY'], config['REMINDER_MAX_RETRIES']) as sender:
+        for batch in batched(group_digests(rows), config['REMINDER_BATCH_SIZE']):
+            if not dry_run:
+                # One committed claim per batch, before the first email of it goes out.
+                with db.session.begin():
+                    claimed = claim_meetings([meeting for digest in batch for meeting in digest.meetings])
+                batch = [digest._replace(meetings=[
+                    meeting for meeting in digest.meetings
+                    if (meeting.opportunity_id, meeting.meeting_date) in claimed
+                ]) for digest in batch]
+                batch = [digest for digest in batch if digest.meetings]
+
+            messages = [build_message(digest, start, end) for digest in batch]
+            digests += len(batch)
+            meetings += sum(len(digest.meetings) for digest in batch)
+            if dry_run:
+                continue
+            for digest, message in zip(batch, messages):
+                if not sender.send(message):
+                    with db.session.begin():
+                        release_meetings(digest.meetings)
+
+    return {'digests': digests, 'meetings': meetings, 'sent': sender.sent, 'failed': sender.failed}
+
+def first_run_after(now, hour):
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+def start_reminder_scheduler(app):
+    interval = app.config['REMINDER_INTERVAL']
+    if not interval:
+        return None
+
+    def run():
+        # Runs happen at fixed wall-clock times rather than at boot, so
+        # restarts and deploys don't trigger an extra round of emails.
+        run_at = first_run_after(datetime.now(), app.config['REMINDER_HOUR'])
+        while True:
+            socketio.sleep(max((run_at - datetime.now()).total_seconds(), 0))
+            with app.app_context():
+                try:
+                    result = send_meeting_reminders()
+                    app.logger.info(f'Meeting reminders: {result}')
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f'Failed to send meeting reminders: {str(e)}')
+                finally:
+                    db.session.remove()
+            while run_at <= datetime.now():
+                run_at += timedelta(seconds=interval)
+
+    return socketio.start_background_task(run)
@@ -1,15 +1,21 @@
-from flask import render_template, request, jsonify, redirect, url_for, send_from_directory, flash, Response
+from flask import Blueprint, current_app, render_template, request, jsonify, redirect, url_for, send_from_directory, send_file, flash, Response, abort
 from werkzeug.utils import secure_filename
-from app import app, db, socketio
-from models import Company, Collaboration, Opportunity, Document
+from extensions import db, socketio
+from models import Company, Collaboration, Opportunity, Document, ArchivedDocument
+from archive import collaboration_source, opportunity_source
+from dedup import find_matches, index_company, merge_companies
+from socket_stats import stats as socket_stats
+from assets import send_asset
+from exports import SNAPSHOT_DATASETS, SNAPSHOT_FORMATS, get_snapshot, snapshot_path, start_refresh
 from datetime import datetime
 from sqlalchemy import or_, func, text
 import os
-import magic
 import csv
 import io
 from contextlib import closing
 
+bp = Blueprint('main', __name__)
+
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt', 'rtf'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -21,7 +27,10 @@ def generate_csv(rows, fieldnames):
     writer.writerows(rows)
     return output.getvalue()
 
-@app.route('/')
+def include_archived():
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+@bp.route('/')
 def dashboard():
     try:
         with db.session.begin():
@@ -37,11 +46,21 @@ def dashboard():
         flash(f'Error loading dashboard: {str(e)}', 'error')
         return render_template('dashboard.html', companies=[], collaborations=[], opportunities=[])
 
-@app.route('/company/new', methods=['GET', 'POST'])
+@bp.route('/company/new', methods=['GET', 'POST'])
 def new_company():
     if request.method == 'POST':
         try:
             with db.session.begin():
+                if not request.form.get('confirm_duplicate'):
+                    matches = find_matches(request.form['name'],
+                                           request.form['contact_email'],
+                                           request.form['contact_phone'],
+                                           threshold=current_app.config['DEDUP_MATCH_THRESHOLD'])
+                    if matches:
+                        existing = db.session.get(Company, matches[0].company_id)
+                        flash(f'{existing.name} already exists; opened it instead of adding a duplicate.', 'warning')
+                        return redirect(url_for('main.company_detail', id=existing.id))
+
                 company = Company(
                     name=request.form['name'],
                     industry=request.form['industry'],
@@ -49,14 +68,47 @@ def new_company():
                     contact_phone=request.form['contact_phone'],
                 )
                 db.session.add(company)
-            return redirect(url_for('dashboard'))
+                db.session.flush()
+                index_company(company)
+            return redirect(url_for('main.dashboard'))
         except Exception as e:
             db.session.rollback()
             flash(f'Error creating company: {str(e)}', 'error')
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
     return render_template('company_form.html')
 
-@app.route('/company/<int:id>')
+@bp.route('/company/duplicates')
+def company_duplicates():
+    try:
+        with db.session.begin():
+            matches = find_matches(request.args.get('name', ''),
+                                   request.args.get('contact_email'),
+                                   request.args.get('contact_phone'),
+                                   threshold=current_app.config['DEDUP_MATCH_THRESHOLD'])
+            companies = {c.id: c for c in Company.query.filter(Company.id.in_([m.company_id for m in matches]))}
+            return jsonify([{
+                'id': match.company_id,
+                'name': companies[match.company_id].name,
+                'industry': companies[match.company_id].industry,
+                'score': round(match.score, 2),
+                'reasons': match.reasons
+            } for match in matches])
+    except Exception as e:
+        db.session.rollback()
+        return jsonify([])
+
+@bp.route('/company/<int:id>/merge', methods=['POST'])
+def merge_company(id):
+    try:
+        with db.session.begin():
+            duplicate_ids = [int(company_id) for company_id in request.form.getlist('duplicate_id')]
+            moved = merge_companies(id, duplicate_ids)
+            return jsonify({'success': True, 'company_id': id, 'moved': moved})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)})
+
+@bp.route('/company/<int:id>')
 def company_detail(id):
     try:
         with db.session.begin():
@@ -65,9 +117,9 @@ def company_detail(id):
     except Exception as e:
         db.session.rollback()
         flash(f'Error loading company details: {str(e)}', 'error')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
-@app.route('/collaboration/new', methods=['POST'])
+@bp.route('/collaboration/new', methods=['POST'])
 def new_collaboration():
     try:
         with db.session.begin():
@@ -92,14 +144,14 @@ def new_collaboration():
                     'status': collab.status,
                     'kpi_satisfaction': collab.kpi_satisfaction
                 }
-            })
+            }, to='collaboration_updated')
             
             return jsonify({'success': True, 'collaboration_id': collab.id})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/opportunity/new', methods=['POST'])
+@bp.route('/opportunity/new', methods=['POST'])
 def new_opportunity():
     try:
         with db.session.begin():
@@ -125,14 +177,14 @@ def new_opportunity():
                     'probability': opportunity.probability,
                     'expected_revenue': opportunity.expected_revenue
                 }
-            })
+            }, to='opportunity_updated')
             
             return jsonify({'success': True, 'opportunity_id': opportunity.id})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/opportunity/<int:id>/update', methods=['POST'])
+@bp.route('/opportunity/<int:id>/update', methods=['POST'])
 def update_opportunity(id):
     try:
         with db.session.begin():
@@ -150,14 +202,14 @@ def update_opportunity(id):
                     'stage': opportunity.stage,
                     'probability': opportunity.probability
                 }
-            })
+            }, to='opportunity_updated')
             
             return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/pipeline')
+@bp.route('/pipeline')
 def pipeline():
     try:
         with db.session.begin():
@@ -169,7 +221,11 @@ def pipeline():
         flash(f'Error loading pipeline: {str(e)}', 'error')
         return render_template('pipeline.html', opportunities=[], companies=[])
 
-@app.route('/search')
+@bp.route('/assets/<path:filename>')
+def asset(filename):
+    return send_asset(filename)
+
+@bp.route('/search')
 def search():
     query = request.args.get('q', '')
     try:
@@ -189,7 +245,7 @@ def search():
         db.session.rollback()
         return jsonify([])
 
-@app.route('/document/upload', methods=['POST'])
+@bp.route('/document/upload', methods=['POST'])
 def upload_document():
     try:
         if 'file' not in request.files:
@@ -204,9 +260,10 @@ def upload_document():
         
         with db.session.begin():
             filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
             file.save(file_path)
             
+            import magic  # libmagic is slow to load; only uploads need it
             mime = magic.Magic()
             file_type = mime.from_file(file_path)
             
@@ -232,18 +289,18 @@ def upload_document():
                 pass
         return jsonify({'success': False, 'error': str(e)})
 
-@app.route('/document/<int:id>/download')
+@bp.route('/document/<int:id>/download')
 def download_document(id):
     try:
         with db.session.begin():
-            document = Document.query.get_or_404(id)
-            return send_from_directory(app.config['UPLOAD_FOLDER'], document.filename)
+            document = Document.query.get(id) or ArchivedDocument.query.get_or_404(id)
+            return send_from_directory(current_app.config['UPLOAD_FOLDER'], document.filename)
     except Exception as e:
         db.session.rollback()
         flash(f'Error downloading document: {str(e)}', 'error')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
-@app.route('/company/<int:id>/documents')
+@bp.route('/company/<int:id>/documents')
 def company_documents(id):
     try:
         with db.session.begin():
@@ -252,9 +309,9 @@ def company_documents(id):
     except Exception as e:
         db.session.rollback()
         flash(f'Error loading company documents: {str(e)}', 'error')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
-@app.route('/collaboration/<int:id>/documents')
+@bp.route('/collaboration/<int:id>/documents')
 def collaboration_documents(id):
     try:
         with db.session.begin():
@@ -263,25 +320,28 @@ def collaboration_documents(id):
     except Exception as e:
         db.session.rollback()
         flash(f'Error loading collaboration documents: {str(e)}', 'error')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
 
-@app.route('/analytics')
+@bp.route('/analytics')
 def analytics_dashboard():
     return render_template('analytics.html')
 
-@app.route('/api/analytics/revenue')
+@bp.route('/api/analytics/revenue')
 def revenue_analytics():
     try:
         with db.session.begin():
+            opportunities = opportunity_source(include_archived())
+            collaborations = collaboration_source(include_archived())
+
             stage_revenue = db.session.query(
-                Opportunity.stage,
-                func.sum(Opportunity.expected_revenue * Opportunity.probability / 100).label('weighted_revenue')
-            ).group_by(Opportunity.stage).all()
+                opportunities.c.stage,
+                func.sum(opportunities.c.expected_revenue * opportunities.c.probability / 100).label('weighted_revenue')
+            ).group_by(opportunities.c.stage).all()
             
             collab_revenue = db.session.query(
-                Collaboration.status,
-                func.sum(Collaboration.kpi_revenue).label('total_revenue')
-            ).group_by(Collaboration.status).all()
+                collaborations.c.status,
+                func.sum(collaborations.c.kpi_revenue).label('total_revenue')
+            ).group_by(collaborations.c.status).all()
             
             return jsonify({
                 'stage_revenue': [{
@@ -297,14 +357,15 @@ def revenue_analytics():
         db.session.rollback()
         return jsonify({'stage_revenue': [], 'collab_revenue': []})
 
-@app.route('/api/analytics/satisfaction')
+@bp.route('/api/analytics/satisfaction')
 def satisfaction_analytics():
     try:
         with db.session.begin():
+            collaborations = collaboration_source(include_archived())
             satisfaction_scores = db.session.query(
                 Company.name,
-                func.avg(Collaboration.kpi_satisfaction).label('avg_satisfaction')
-            ).join(Collaboration).group_by(Company.name).all()
+                func.avg(collaborations.c.kpi_satisfaction).label('avg_satisfaction')
+            ).join(collaborations, collaborations.c.company_id == Company.id).group_by(Company.name).all()
             
             return jsonify([{
                 'company': score[0],
@@ -314,15 +375,16 @@ def satisfaction_analytics():
         db.session.rollback()
         return jsonify([])
 
-@app.route('/api/analytics/pipeline')
+@bp.route('/api/analytics/pipeline')
 def pipeline_analytics():
     try:
         with db.session.begin():
+            opportunities = opportunity_source(include_archived())
             pipeline_stats = db.session.query(
-                Opportunity.stage,
-                func.count(Opportunity.id).label('count'),
-                func.sum(Opportunity.expected_revenue).label('total_value')
-            ).group_by(Opportunity.stage).all()
+                opportunities.c.stage,
+                func.count(opportunities.c.id).label('count'),
+                func.sum(opportunities.c.expected_revenue).label('total_value')
+            ).group_by(opportunities.c.stage).all()
             
             return jsonify([{
                 'stage': stat[0],
@@ -333,7 +395,17 @@ def pipeline_analytics():
         db.session.rollback()
         return jsonify([])
 
-@app.route('/export/companies')
+@bp.route('/api/socket/stats')
+def socket_statistics():
+    return jsonify(dict(socket_stats.snapshot(),
+                        pid=os.getpid(),
+                        serializer=current_app.config['SOCKETIO_SERIALIZER']))
+
+@bp.route('/api/boot-stats')
+def boot_statistics():
+    return jsonify(current_app.extensions['boot_stats'])
+
+@bp.route('/export/companies')
 def export_companies():
     try:
         with db.session.begin():
@@ -356,20 +428,21 @@ def export_companies():
         db.session.rollback()
         return jsonify({'error': f'Failed to export companies: {str(e)}'}), 500
 
-@app.route('/export/collaborations')
+@bp.route('/export/collaborations')
 def export_collaborations():
     try:
         with db.session.begin():
-            collaborations = Collaboration.query.all()
+            collaborations = collaboration_source(include_archived())
             rows = [{
                 'title': collab.title,
-                'company_name': collab.company.name,
+                'company_name': collab.company_name,
                 'status': collab.status,
                 'start_date': collab.start_date.strftime('%Y-%m-%d') if collab.start_date else '',
                 'end_date': collab.end_date.strftime('%Y-%m-%d') if collab.end_date else '',
                 'revenue': collab.kpi_revenue,
                 'satisfaction': collab.kpi_satisfaction
-            } for collab in collaborations]
+            } for collab in db.session.query(collaborations, Company.name.label('company_name')).join(
+                Company, collaborations.c.company_id == Company.id)]
 
             output = generate_csv(rows, ['title', 'company_name', 'status', 'start_date', 
                                       'end_date', 'revenue', 'satisfaction'])
@@ -383,19 +456,20 @@ def export_collaborations():
         db.session.rollback()
         return jsonify({'error': f'Failed to export collaborations: {str(e)}'}), 500
 
-@app.route('/export/opportunities')
+@bp.route('/export/opportunities')
 def export_opportunities():
     try:
         with db.session.begin():
-            opportunities = Opportunity.query.all()
+            opportunities = opportunity_source(include_archived())
             rows = [{
                 'title': opp.title,
-                'company_name': opp.company.name,
+                'company_name': opp.company_name,
                 'stage': opp.stage,
                 'expected_revenue': opp.expected_revenue,
                 'probability': opp.probability,
                 'next_meeting_date': opp.next_meeting_date.strftime('%Y-%m-%d') if opp.next_meeting_date else ''
-            } for opp in opportunities]
+            } for opp in db.session.query(opportunities, Company.name.label('company_name')).join(
+                Company, opportunities.c.company_id == Company.id)]
 
             output = generate_csv(rows, ['title', 'company_name', 'stage', 'expected_revenue', 
                                       'probability', 'next_meeting_date'])
@@ -407,4 +481,31 @@ def export_opportunities():
             )
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': f'Failed to export opportunities: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Failed to export opportunities: {str(e)}'}), 500
+
+@bp.route('/export/<dataset>.<fmt>')
+def export_snapshot(dataset, fmt):
+    if dataset not in SNAPSHOT_DATASETS or fmt not in SNAPSHOT_FORMATS:
+        abort(404)
+    try:
+        snapshot = get_snapshot(dataset)
+        response = send_file(
+            snapshot_path(snapshot, fmt),
+            mimetype=SNAPSHOT_FORMATS[fmt],
+            as_attachment=True,
+            download_name=f'{dataset}.{fmt}',
+            etag=f"{snapshot['version']}-{fmt}",
+            last_modified=datetime.fromisoformat(snapshot['generated_at']),
+            max_age=0,
+            conditional=True
+        )
+        response.headers['X-Snapshot-Version'] = snapshot['version']
+        return response
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to export {dataset} snapshot: {str(e)}'}), 500
+
+@bp.route('/export/snapshots/refresh', methods=['POST'])
+def refresh_export_snapshots():
+    started = start_refresh(current_app._get_current_object())
+    return jsonify({'success': True, 'started': started, 'datasets': list(SNAPSHOT_DATASETS)}), 202
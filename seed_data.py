@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
 import random
-from app import app, db
+from app import create_app
+from commands import init_db
+from extensions import db
 from models import Company, Collaboration
+from dedup import company_records, rebuild_index
 
 # Sample data
 companies_data = [
@@ -116,6 +119,10 @@ def seed_database():
         companies.append(company)
     
     db.session.commit()
+
+    # Index the new companies for duplicate checks
+    rebuild_index(company_records())
+    db.session.commit()
     
     # Add collaborations
     statuses = ["Active", "Completed", "On Hold"]
@@ -152,5 +159,6 @@ def seed_database():
     print("Sample data has been added successfully!")
 
 if __name__ == "__main__":
-    with app.app_context():
+    with create_app().app_context():
+        init_db()
         seed_database()
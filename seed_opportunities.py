@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 import random
-from app import app, db
+from app import create_app
+from commands import init_db
+from extensions import db
 from models import Company, Opportunity
 
 # Opportunity types with detailed descriptions
@@ -122,5 +124,6 @@ def seed_opportunities():
         print(f"{stage}: {count}")
 
 if __name__ == "__main__":
-    with app.app_context():
+    with create_app().app_context():
+        init_db()
         seed_opportunities()
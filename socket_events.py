@@ -1,22 +1,46 @@
-from app import socketio
-from flask_socketio import emit
+from extensions import socketio
+from flask_socketio import emit, join_room, leave_room
 from datetime import datetime
+from socket_stats import stats
+
+# Events a page can subscribe to. Each one is broadcast only to the room of
+# the same name, so a tab receives just the updates its page listens for.
+SUBSCRIBABLE_EVENTS = {'collaboration_updated', 'opportunity_updated', 'document_added', 'analytics_update'}
 
 @socketio.on('connect')
 def handle_connect():
+    stats.connected()
     emit('connection_response', {'data': 'Connected successfully'})
 
+@socketio.on('disconnect')
+def handle_disconnect():
+    stats.disconnected()
+
+@socketio.on('subscribe')
+def handle_subscribe(events):
+    if isinstance(events, str):
+        events = [events]
+    for event in set(events or []) & SUBSCRIBABLE_EVENTS:
+        join_room(event)
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe(events):
+    if isinstance(events, str):
+        events = [events]
+    for event in set(events or []) & SUBSCRIBABLE_EVENTS:
+        leave_room(event)
+
 @socketio.on('update_collaboration')
 def handle_collaboration_update(data):
-    # Broadcast the collaboration update to all connected clients
-    emit('collaboration_updated', data, broadcast=True)
+    # Broadcast the collaboration update to all subscribed clients
+    emit('collaboration_updated', data, to='collaboration_updated')
 
 @socketio.on('update_opportunity')
 def handle_opportunity_update(data):
-    # Broadcast the opportunity update to all connected clients
-    emit('opportunity_updated', data, broadcast=True)
+    # Broadcast the opportunity update to all subscribed clients
+    emit('opportunity_updated', data, to='opportunity_updated')
 
 @socketio.on('new_document')
 def handle_new_document(data):
-    # Broadcast new document notification to all connected clients
-    emit('document_added', data, broadcast=True)
+    # Broadcast new document notification to all subscribed clients
+    emit('document_added', data, to='document_added')
@@ -0,0 +1,93 @@
+import threading
+from datetime import datetime
+
+from engineio import packet as eio_packet
+from socketio.msgpack_packet import MsgPackPacket
+from socketio.packet import Packet
+
+# Per-worker Socket.IO counters: open connections and the encoded size of
+# every message going out or coming in, after the serializer has run.
+# Egress is counted per recipient at the Engine.IO layer, since a broadcast
+# is encoded once and then written to every socket in the room.
+
+class SocketStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.utcnow()
+        self.connections = 0
+        self.peak_connections = 0
+        self.total_connections = 0
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.packets_received = 0
+        self.bytes_received = 0
+
+    def connected(self):
+        with self._lock:
+            self.connections += 1
+            self.total_connections += 1
+            self.peak_connections = max(self.peak_connections, self.connections)
+
+    def disconnected(self):
+        with self._lock:
+            self.connections = max(self.connections - 1, 0)
+
+    def sent(self, encoded):
+        size = encoded_size(encoded)
+        with self._lock:
+            self.packets_sent += 1
+            self.bytes_sent += size
+
+    def received(self, encoded):
+        size = encoded_size(encoded)
+        with self._lock:
+            self.packets_received += 1
+            self.bytes_received += size
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'started_at': self.started_at.isoformat(),
+                'connections': self.connections,
+                'peak_connections': self.peak_connections,
+                'total_connections': self.total_connections,
+                'packets_sent': self.packets_sent,
+                'bytes_sent': self.bytes_sent,
+                'packets_received': self.packets_received,
+                'bytes_received': self.bytes_received,
+            }
+
+def encoded_size(encoded):
+    # The text serializer returns a list when a packet carries binary attachments.
+    if isinstance(encoded, list):
+        return sum(encoded_size(part) for part in encoded)
+    if isinstance(encoded, str):
+        return len(encoded.encode('utf-8'))
+    return len(encoded)
+
+stats = SocketStats()
+
+SERIALIZERS = {
+    'default': Packet,
+    'msgpack': MsgPackPacket,
+}
+
+def counting_serializer(name):
+    base = SERIALIZERS[name]
+
+    class CountingPacket(base):
+        def decode(self, encoded_packet):
+            stats.received(encoded_packet)
+            return super().decode(encoded_packet)
+
+    return CountingPacket
+
+def count_egress(eio):
+    send_packet = eio.send_packet
+
+    def counting_send_packet(sid, pkt):
+        if pkt.packet_type == eio_packet.MESSAGE:
+            stats.sent(pkt.data)
+        return send_packet(sid, pkt)
+
+    eio.send_packet = counting_send_packet
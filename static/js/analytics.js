@@ -18,8 +18,7 @@ document.addEventListener('DOMContentLoaded', async function() {
         easing: 'easeInOutQuart'
     };
 
-    // Connect to WebSocket for real-time updates
-    const socket = io();
+    // Real-time updates arrive over the tab's shared WebSocket connection
     
     // Fetch initial analytics data
     const [revenueData, satisfactionData, pipelineData] = await Promise.all([
@@ -232,7 +231,7 @@ document.addEventListener('DOMContentLoaded', async function() {
     });
 
     // Handle real-time updates via WebSocket
-    socket.on('analytics_update', (data) => {
+    Realtime.on('analytics_update', (data) => {
         if (data.type === 'revenue') {
             updateRevenueCharts(data);
         } else if (data.type === 'satisfaction') {
@@ -24,6 +24,60 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // Warn about likely duplicates before adding a company
+    const companyForm = document.getElementById('companyForm');
+    if (companyForm) {
+        // Editing the form after a warning asks the server again
+        companyForm.addEventListener('input', () => {
+            companyForm.elements['confirm_duplicate'].value = '';
+        });
+
+        companyForm.addEventListener('submit', async (e) => {
+            if (companyForm.elements['confirm_duplicate'].value) {
+                return;
+            }
+            e.preventDefault();
+            const params = new URLSearchParams({
+                name: companyForm.elements['name'].value,
+                contact_email: companyForm.elements['contact_email'].value,
+                contact_phone: companyForm.elements['contact_phone'].value
+            });
+
+            try {
+                const response = await fetch(`/company/duplicates?${params}`);
+                const matches = await response.json();
+                if (matches.length) {
+                    const warning = document.getElementById('companyDuplicates');
+                    warning.innerHTML = `
+                        <p class="mb-2">This looks like a company you already track:</p>
+                        <div class="duplicate-matches"></div>
+                        <p class="mt-2 mb-0">Submit again to add it anyway.</p>
+                    `;
+                    // Company names are user input, so they only ever go in as text
+                    const list = warning.querySelector('.duplicate-matches');
+                    matches.forEach(company => {
+                        const link = document.createElement('a');
+                        link.href = `/company/${encodeURIComponent(company.id)}`;
+                        link.className = 'd-block';
+                        link.textContent = company.name;
+                        const badge = document.createElement('span');
+                        badge.className = 'badge bg-secondary ms-1';
+                        badge.textContent = `${Math.round(company.score * 100)}% match`;
+                        link.appendChild(badge);
+                        list.appendChild(link);
+                    });
+                    warning.classList.remove('d-none');
+                    companyForm.elements['confirm_duplicate'].value = '1';
+                    return;
+                }
+            } catch (error) {
+                console.error('Duplicate check error:', error);
+            }
+            companyForm.elements['confirm_duplicate'].value = '1';
+            companyForm.submit();
+        });
+    }
+
     // Initialize KPI charts
     const progressBars = document.querySelectorAll('.progress-bar');
     progressBars.forEach(bar => {
@@ -0,0 +1,46 @@
+// Single Socket.IO connection per tab, shared by every page script.
+// Page scripts register handlers through Realtime.on(); the server only
+// sends a tab the events it has subscribed to.
+window.Realtime = (function() {
+    let socket = null;
+    const subscriptions = new Set();
+
+    function connect() {
+        if (!socket) {
+            // Default transports: long-polling first, then upgrade to WebSocket where it works
+            socket = io();
+
+            // Rooms are per connection, so re-subscribe after every reconnect
+            socket.on('connect', () => {
+                if (subscriptions.size) {
+                    socket.emit('subscribe', Array.from(subscriptions));
+                }
+            });
+        }
+        return socket;
+    }
+
+    function on(event, handler) {
+        const conn = connect();
+        conn.on(event, handler);
+        if (!subscriptions.has(event)) {
+            subscriptions.add(event);
+            if (conn.connected) {
+                conn.emit('subscribe', [event]);
+            }
+        }
+        return () => off(event, handler);
+    }
+
+    function off(event, handler) {
+        if (!socket) {
+            return;
+        }
+        socket.off(event, handler);
+        if (!socket.hasListeners(event) && subscriptions.delete(event)) {
+            socket.emit('unsubscribe', [event]);
+        }
+    }
+
+    return { connect, on, off };
+})();
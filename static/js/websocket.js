@@ -1,47 +1,50 @@
 document.addEventListener('DOMContentLoaded', function() {
-    // Connect to WebSocket server
-    const socket = io();
+    // Share the tab's WebSocket connection
+    const socket = Realtime.connect();
 
     socket.on('connect', () => {
         console.log('Connected to WebSocket server');
     });
 
-    socket.on('collaboration_updated', (data) => {
-        if (data.action === 'new') {
-            // Update collaborations grid if we're on the dashboard
-            const collaborationsGrid = document.getElementById('collaborationsGrid');
-            if (collaborationsGrid) {
+    // Only subscribe to the updates this page can render
+    const collaborationsGrid = document.getElementById('collaborationsGrid');
+    if (collaborationsGrid) {
+        Realtime.on('collaboration_updated', (data) => {
+            if (data.action === 'new') {
+                // Update collaborations grid on the dashboard
                 const newCard = createCollaborationCard(data.collaboration);
                 collaborationsGrid.insertAdjacentHTML('afterbegin', newCard);
             }
-        }
-    });
+        });
+    }
 
-    socket.on('opportunity_updated', (data) => {
-        if (data.action === 'new') {
-            // Update opportunities view if we're on the pipeline page
-            const stageContainer = document.querySelector(`[data-stage="${data.opportunity.stage}"]`);
-            if (stageContainer) {
-                const newCard = createOpportunityCard(data.opportunity);
-                stageContainer.insertAdjacentHTML('afterbegin', newCard);
+    if (document.querySelector('[data-stage]')) {
+        Realtime.on('opportunity_updated', (data) => {
+            if (data.action === 'new') {
+                // Update opportunities view on the pipeline page
+                const stageContainer = document.querySelector(`[data-stage="${data.opportunity.stage}"]`);
+                if (stageContainer) {
+                    const newCard = createOpportunityCard(data.opportunity);
+                    stageContainer.insertAdjacentHTML('afterbegin', newCard);
+                }
+            } else if (data.action === 'update') {
+                // Update existing opportunity card
+                const card = document.querySelector(`[data-id="${data.opportunity.id}"]`);
+                if (card) {
+                    updateOpportunityCard(card, data.opportunity);
+                }
             }
-        } else if (data.action === 'update') {
-            // Update existing opportunity card
-            const card = document.querySelector(`[data-id="${data.opportunity.id}"]`);
-            if (card) {
-                updateOpportunityCard(card, data.opportunity);
-            }
-        }
-    });
+        });
+    }
 
-    socket.on('document_added', (data) => {
-        // Update documents list if we're on the documents page
-        const documentsList = document.querySelector('.list-group');
-        if (documentsList) {
+    const documentsList = document.querySelector('.list-group');
+    if (documentsList) {
+        Realtime.on('document_added', (data) => {
+            // Update documents list
             const newDoc = createDocumentListItem(data.document);
             documentsList.insertAdjacentHTML('afterbegin', newDoc);
-        }
-    });
+        });
+    }
 
     // Helper functions to create HTML elements
     function createCollaborationCard(collaboration) {